@@ -14,7 +14,7 @@ from .statistics import Stats
 from .users import Users
 from .groups import Groups
 from .agreements import Agreements
-from .utils import load_data, report_conflicts, save_data
+from .utils import load_data, make_http_adapter, report_conflicts, save_data
 
 
 class FASWrapper:
@@ -215,6 +215,10 @@ def cli(
         ipa_instances = []
         for instance in config["ipa"]["instances"]:
             ipa = Client(host=instance, verify_ssl=config["ipa"]["cert_path"])
+            # Users are migrated concurrently, keep enough connections to the server open
+            ipa._session.mount(
+                "https://", make_http_adapter(config["migrate_concurrency"])
+            )
             ipa.login(config["ipa"]["username"], config["ipa"]["password"])
             ipa_instances.append(ipa)
         click.echo("Logged into IPA")
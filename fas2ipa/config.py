@@ -10,6 +10,12 @@ DEFAULT_CONFIG = {
     # We batch our queries (groups, users, memberships, etc).
     # How many objects maximum should be in each request?
     "chunks": 30,
+    # How many of these queries should be sent to IPA in a single batch request?
+    "batch_size": 100,
+    # How many requests may be in flight against a single FAS instance at once?
+    "fas_concurrency": 4,
+    # How many users should be migrated to IPA in parallel?
+    "migrate_concurrency": 10,
     # Record and replay requests to FAS (for testing)
     "replay": False,
     # Users configuration
@@ -12,7 +12,7 @@ class Status(Enum):
     REMOVED = "REMOVED"
 
 
-def print_status(status, text=None):
+def print_status(status, text=None, prefix=""):
     if status == Status.ADDED:
         color = Style.BRIGHT + Fore.GREEN
     elif status == Status.UPDATED:
@@ -27,4 +27,4 @@ def print_status(status, text=None):
         color = Style.NORMAL + Fore.MAGENTA
     else:
         raise ValueError(f"Unknown status: {status!r}")
-    print(f"{color}{text or status.value}{Style.RESET_ALL}")
+    print(f"{prefix}{color}{text or status.value}{Style.RESET_ALL}")
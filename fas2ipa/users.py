@@ -1,77 +1,203 @@
 import string
 import re
-from collections import defaultdict
-from fnmatch import fnmatchcase
-from typing import Any, Dict, List, Optional, Sequence
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fnmatch import translate
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
 
 import click
 import progressbar
 import python_freeipa
 
 from .status import Status, print_status
-from .utils import ObjectManager
+from .utils import ObjectManager, re_auth
 from .statistics import Stats
 
 
 CREATION_TIME_RE = re.compile(r"([0-9 :-]+).[0-9]+\+00:00")
 
+# The highest Unicode code point, sorts after any character a "*" could match
+STAR_SENTINEL = "\U0010ffff"
+
+# Keys of FAS user objects that are migrated
+PROCESSED_KEYS = frozenset(
+    {
+        "username",
+        "human_name",
+        "status",
+        "email",
+        "ircnick",
+        "locale",
+        "timezone",
+        "gpg_keyid",
+        "ssh_key",
+        "creation",
+        "privacy",
+    }
+)
+
+# Keys of FAS user objects that aren't migrated, as well as any key containing "token"
+IGNORED_KEYS = frozenset(
+    {
+        "affiliation",
+        "alias_enabled",
+        "certificate_serial",
+        "comments",
+        "country_code",
+        "facsimile",
+        "group_roles",
+        "id",
+        "internal_comments",
+        "ipa_sync_status",
+        "last_seen",
+        "latitude",
+        "longitude",
+        "memberships",
+        "old_password",
+        "password",
+        "password_changed",
+        "postal_address",
+        "roles",
+        "security_answer",
+        "security_question",
+        "status_change",
+        "telephone",
+        "unverified_email",
+    }
+)
+
+# How often to log in again and retry migrating a user when the session is rejected,
+# and the initial cooldown (in seconds) between retries, doubled on every retry
+REAUTH_RETRIES = 5
+REAUTH_COOLDOWN = 2
+
 
 class Users(ObjectManager):
     def __init__(self, *args, agreements, **kwargs):
         super().__init__(*args, **kwargs)
         self.agreements = agreements
 
+        # Per FAS instance settings needed for every user, looked up only once
+        self._agreements_by_fas = {
+            fas_name: [
+                (agreement["name"], frozenset(agreement["signed_groups"]))
+                for agreement in fas_conf.get("agreement", ())
+            ]
+            for fas_name, fas_conf in self.config["fas"].items()
+        }
+        self._ignore_groups_by_fas = {
+            fas_name: frozenset(fas_conf["groups"].get("ignore", ()))
+            for fas_name, fas_conf in self.config["fas"].items()
+        }
+        self._group_prefix_by_fas = {
+            fas_name: fas_conf["groups"].get("prefix", "")
+            for fas_name, fas_conf in self.config["fas"].items()
+        }
+
     @staticmethod
+    @lru_cache(maxsize=8)
     def _make_user_patterns(
-        users_start_at: Optional[str], restrict_users: Optional[Sequence[str]],
-    ) -> List[str]:
+        users_start_at: Optional[str], restrict_users: Optional[Tuple[str, ...]],
+    ) -> Tuple[str, ...]:
         if restrict_users:
-            user_patterns = [
+            user_patterns = tuple(
                 pattern
                 for pattern in restrict_users
                 if not users_start_at
-                or pattern.replace("*", "\u0010ffff") >= users_start_at
-            ]
+                or pattern.replace("*", STAR_SENTINEL) >= users_start_at
+            )
         else:
-            restrict_users = ()
             alphabet = list(string.ascii_lowercase)
             if users_start_at:
                 start_index = alphabet.index(users_start_at[0].lower())
-                user_patterns = [
+                user_patterns = tuple(
                     pattern + "*"
                     for pattern in [users_start_at] + alphabet[start_index + 1 :]
-                ]
+                )
             else:
-                user_patterns = [pattern + "*" for pattern in alphabet]
+                user_patterns = tuple(pattern + "*" for pattern in alphabet)
 
         return user_patterns
 
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _compile_user_patterns(user_patterns: Tuple[str, ...]) -> Optional[Pattern]:
+        """Compile glob patterns into a single regular expression.
+
+        Returns None if the patterns match any user name.
+        """
+        if "*" in user_patterns:
+            return None
+        return re.compile("|".join(f"(?:{translate(p)})" for p in user_patterns))
+
+    def _fetch_fas_users(self, fas_name, fas_inst, pattern):
+        if "*" in pattern:
+            click.echo(f"[{fas_name}] finding users matching {pattern!r}")
+        else:
+            click.echo(f"[{fas_name}] finding user {pattern!r}")
+
+        result = fas_inst.send_request(
+            "/user/list", req_params={"search": pattern}, auth=True, timeout=240,
+        )
+
+        return chain(result["unapproved_people"], result["people"])
+
     def pull_from_fas(
         self,
         users_start_at: Optional[str] = None,
         restrict_users: Optional[Sequence[str]] = None,
     ) -> Dict[str, List[Dict]]:
-        user_patterns = self._make_user_patterns(users_start_at, restrict_users)
+        user_patterns = self._make_user_patterns(
+            users_start_at, tuple(restrict_users) if restrict_users else None
+        )
+
+        # Each FAS instance gets its own pool of workers, limiting in-flight requests per
+        # instance. Recording/replaying requests patches the HTTP layer globally, so send
+        # all requests one after the other in that case.
+        if self.config["replay"]:
+            replay_executor = ThreadPoolExecutor(max_workers=1)
+            executors = {fas_name: replay_executor for fas_name in self.fas_instances}
+        else:
+            executors = {
+                fas_name: ThreadPoolExecutor(
+                    max_workers=self.config["fas"][fas_name]["fas_concurrency"]
+                )
+                for fas_name in self.fas_instances
+            }
+
+        pattern_results = {}
+        futures = {}
 
+        try:
+            for fas_name, fas_inst in self.fas_instances.items():
+                for pattern in user_patterns:
+                    future = executors[fas_name].submit(
+                        self._fetch_fas_users, fas_name, fas_inst, pattern
+                    )
+                    futures[future] = (fas_name, pattern)
+
+            for future in as_completed(futures):
+                pattern_results[futures.pop(future)] = future.result()
+        except BaseException:
+            # Don't wait for the queued requests before reporting the error
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            for executor in set(executors.values()):
+                executor.shutdown()
+
+        # Assemble results in pattern order, independent of completion order, and drop
+        # the responses as soon as their users are copied over
         fas_matched_users = {}
 
-        for fas_name, fas_inst in self.fas_instances.items():
+        for fas_name in self.fas_instances:
             matched_users = fas_matched_users[fas_name] = []
-
             for pattern in user_patterns:
-                if "*" in pattern:
-                    click.echo(f"[{fas_name}] finding users matching {pattern!r}")
-                else:
-                    click.echo(f"[{fas_name}] finding user {pattern!r}")
-
-                result = fas_inst.send_request(
-                    "/user/list",
-                    req_params={"search": pattern},
-                    auth=True,
-                    timeout=240,
-                )
-
-                people = result["unapproved_people"] + result["people"]
+                people = pattern_results.pop((fas_name, pattern))
                 if users_start_at:
                     matched_users.extend(
                         u for u in people if u.username >= users_start_at
@@ -105,7 +231,15 @@ class Users(ObjectManager):
         groups_to_sponsor_usernames = defaultdict(list)
         agreements_to_usernames = defaultdict(list)
 
-        user_patterns = self._make_user_patterns(users_start_at, restrict_users)
+        if not users_start_at and not restrict_users:
+            # Users are pulled from FAS by their initial letter, they all match
+            patterns_re = None
+        else:
+            patterns_re = self._compile_user_patterns(
+                self._make_user_patterns(
+                    users_start_at, tuple(restrict_users) if restrict_users else None
+                )
+            )
         if not conflicts:
             conflicts = {}
         skip_conflicts = set(self.config["users"].get("skip_conflicts", ()))
@@ -115,15 +249,17 @@ class Users(ObjectManager):
             if not users:
                 continue
 
-            fas_conf = self.config["fas"][fas_name]
+            ignore_groups = self._ignore_groups_by_fas[fas_name]
+            group_prefix = self._group_prefix_by_fas[fas_name]
+            agreements_signed_groups = self._agreements_by_fas[fas_name]
 
             users.sort(key=lambda u: u["username"])
 
-            max_length = max([len(u["username"]) for u in users])
-
-            for person in progressbar.progressbar(users, redirect_stdout=True):
+            persons = []
+            max_length = 0
+            for person in users:
                 username = person["username"]
-                if all(not fnmatchcase(username, pat) for pat in user_patterns):
+                if patterns_re is not None and not patterns_re.match(username):
                     continue
 
                 user_conflicts = set(conflicts.get(username, ()))
@@ -137,43 +273,64 @@ class Users(ObjectManager):
                     skipped += 1
                     continue
 
+                persons.append(person)
+                max_length = max(max_length, len(username))
+
+            pad = max_length + 2
+
+            # Existing users are updated without resetting their locale and timezone if
+            # they're unset in FAS, look them up in bulk rather than one by one.
+            if self.config["skip_user_add"]:
+                existing_ipa_users = {}
+            else:
+                usernames_to_look_up = [
+                    person["username"]
+                    for person in persons
+                    if (not person.get("locale") or not person.get("timezone"))
+                    and not self._is_skipped(person)
+                ]
+                click.echo(
+                    f"Looking up {len(usernames_to_look_up)} users without locale or"
+                    " timezone in IPA"
+                )
+                existing_ipa_users = self._get_ipa_users(usernames_to_look_up)
+
+            for person, status in progressbar.progressbar(
+                self._migrate_users(persons, existing_ipa_users, counter),
+                max_value=len(persons),
+                redirect_stdout=True,
+                # Don't redraw the bar for every user
+                poll_interval=0.5,
+                min_poll_interval=0.1,
+            ):
                 counter += 1
-                self.check_reauth(counter)
-                click.echo(username.ljust(max_length + 2), nl=False)
-                # Add user
-                status = self.migrate_user(person)
+                username = person["username"]
                 if status != Status.SKIPPED:
                     # Record membership
                     for _groupname, membership in person["group_roles"].items():
                         if (
-                            _groupname in fas_conf["groups"].get("ignore", ())
+                            _groupname in ignore_groups
                             or membership["group_id"] is None  # empty list of groups
                         ):
                             continue
-                        groupname = fas_conf["groups"].get("prefix", "") + _groupname
+                        groupname = group_prefix + _groupname
                         if membership["role_status"] == "approved":
-                            groups_to_member_usernames[groupname].append(
-                                person["username"]
-                            )
+                            groups_to_member_usernames[groupname].append(username)
                             if membership["role_type"] in ["administrator", "sponsor"]:
-                                groups_to_sponsor_usernames[groupname].append(
-                                    person["username"]
-                                )
+                                groups_to_sponsor_usernames[groupname].append(username)
                         else:
                             groups_to_unapproved_member_usernames[groupname].append(
-                                person["username"]
+                                username
                             )
                     # Record agreement signatures
-                    group_names = [g["name"] for g in person["memberships"]]
-                    for agreement in fas_conf.get("agreement", ()):
-                        if set(agreement["signed_groups"]) & set(group_names):
+                    group_names = {g["name"] for g in person["memberships"]}
+                    for agreement_name, signed_groups in agreements_signed_groups:
+                        if signed_groups & group_names:
                             # intersection is not empty: the user signed it
-                            agreements_to_usernames[agreement["name"]].append(
-                                person["username"]
-                            )
+                            agreements_to_usernames[agreement_name].append(username)
 
                 # Status
-                print_status(status)
+                print_status(status, prefix=username.ljust(pad))
                 if status == Status.ADDED:
                     added += 1
                 elif status == Status.UPDATED:
@@ -192,6 +349,67 @@ class Users(ObjectManager):
             "users_skipped": skipped,
         }
 
+    def _get_ipa_users(self, usernames):
+        """Look up users in IPA, in batches.
+
+        Returns a dictionary mapping the names of users found in IPA to their locale and
+        timezone. Users which don't exist or couldn't be looked up are left out.
+        """
+        commands = [
+            ("user_show", [username], {"all": True, "no_members": True})
+            for username in usernames
+        ]
+        ipa_users = {}
+        for counter, (username, result) in enumerate(
+            zip(usernames, self.batch(commands)), start=1
+        ):
+            # Batches are requested lazily, this re-authenticates between them
+            self.check_reauth(counter)
+            if isinstance(result, Exception):
+                continue
+            # Only keep what's needed to avoid resetting fields when updating users
+            ipa_user = result["result"]
+            ipa_users[username] = {
+                "faslocale": ipa_user.get("faslocale"),
+                "fastimezone": ipa_user.get("fastimezone"),
+            }
+        return ipa_users
+
+    def _migrate_users(self, persons, existing_ipa_users, counter=0):
+        """Migrate users to IPA concurrently.
+
+        At most `migrate_concurrency` users are in flight at the same time. Results are
+        yielded as `(person, status)` tuples, in the order the users were passed in.
+
+        Re-authenticating logs out of all IPA sessions, so it waits until no users are in
+        flight. `counter` is the number of users migrated before.
+        """
+        concurrency = self.config["migrate_concurrency"]
+        in_flight = deque()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for person in persons:
+                counter += 1
+                if self.needs_reauth(counter):
+                    while in_flight:
+                        person_done, future = in_flight.popleft()
+                        yield person_done, future.result()
+                    re_auth(self.config, self.ipa_instances)
+
+                future = executor.submit(
+                    self.migrate_user,
+                    person,
+                    existing_ipa_users.get(person["username"]),
+                )
+                in_flight.append((person, future))
+                if len(in_flight) >= concurrency:
+                    person_done, future = in_flight.popleft()
+                    yield person_done, future.result()
+
+            while in_flight:
+                person_done, future = in_flight.popleft()
+                yield person_done, future.result()
+
     @classmethod
     def _compact_dict(cls, val):
         # If it has ID fields, it's just to bulky and uninformative.
@@ -230,91 +448,68 @@ class Users(ObjectManager):
         else:
             return val
 
-    def migrate_user(self, person):
-        person_orig = person
-        person = person.copy()
+    def _is_skipped(self, person):
         if self.config["users"]["skip_disabled"] and person.get("status") != "active":
-            return Status.SKIPPED
+            return True
         if (
             self.config["users"]["skip_spam"]
             and person.get("status") == "spamcheck_denied"
         ):
+            return True
+        return False
+
+    def migrate_user(self, person, existing_ipa_user=None, attempt=0, ipa=None):
+        if self._is_skipped(person):
             return Status.SKIPPED
         if self.config["skip_user_add"]:
             return Status.UNMODIFIED
 
-        # Don't modify the original object, and remove all key/value pairs that should
-        # be ignored
-        ignored_keys = {
-            "affiliation",
-            "alias_enabled",
-            "certificate_serial",
-            "comments",
-            "country_code",
-            "facsimile",
-            "group_roles",
-            "id",
-            "internal_comments",
-            "ipa_sync_status",
-            "last_seen",
-            "latitude",
-            "longitude",
-            "memberships",
-            "old_password",
-            "password",
-            "password_changed",
-            "postal_address",
-            "roles",
-            "security_answer",
-            "security_question",
-            "status_change",
-            "telephone",
-            "unverified_email",
+        # Stick to one IPA client, so a rejected session is renewed on that client
+        if ipa is None:
+            ipa = self.ipa
+
+        username = person["username"]
+        human_name = person["human_name"]
+        status = person["status"]
+        email = person["email"]
+        ircnick = person["ircnick"]
+        locale = person["locale"]
+        timezone = person["timezone"]
+        gpg_keyid = person["gpg_keyid"]
+        ssh_key = person["ssh_key"]
+        creation = person["creation"]
+        privacy = person["privacy"]
+
+        # Fail if any details are neither processed nor ignored
+        unprocessed = {
+            key: person[key]
+            for key in person.keys() - PROCESSED_KEYS - IGNORED_KEYS
+            if "token" not in key
         }
-        ignored_key_substrings = ("token",)
-        person = {
-            key: value
-            for key, value in person.items()
-            if not (
-                key in ignored_keys or any(t in key for t in ignored_key_substrings)
-            )
-        }
-
-        # Pop all key/value pairs that are processed
-        username = person.pop("username")
-        human_name = person.pop("human_name")
-        status = person.pop("status")
-        email = person.pop("email")
-        ircnick = person.pop("ircnick")
-        locale = person.pop("locale")
-        timezone = person.pop("timezone")
-        gpg_keyid = person.pop("gpg_keyid")
-        ssh_key = person.pop("ssh_key")
-        creation = person.pop("creation")
-        privacy = person.pop("privacy")
-
-        # Fail if any details are left, i.e. unprocessed
-        if person:
-            print("Unprocessed details:")
-            for key, value in sorted(person.items(), key=lambda x: x[0]):
+        if unprocessed:
+            lines = [f"Unprocessed details for {username}:"]
+            for key in sorted(unprocessed):
                 if (
                     key in {"email", "ssh_key", "telephone", "facsimile"}
                     or "password" in key
                 ):
-                    print(f"\t{key}: <…shhhhh…>")
+                    lines.append(f"\t{key}: <…shhhhh…>")
                 else:
-                    print(f"\t{key}: {self._compact_value(value)}")
+                    lines.append(f"\t{key}: {self._compact_value(unprocessed[key])}")
+            # Print in one go, other users are migrated concurrently
+            print("\n".join(lines))
             return Status.FAILED
 
         if human_name:
             name = human_name.strip()
-            name_split = name.split(" ")
-            if len(name_split) > 2 or len(name_split) == 1:
-                first_name = "<first-name-unset>"
-                last_name = name
-            else:
+            # Only "first last" can be split reliably, don't split any further
+            name_split = name.split(" ", 2)
+            if len(name_split) == 2:
                 first_name = name_split[0].strip()
                 last_name = name_split[1].strip()
+            else:
+                first_name = "<first-name-unset>"
+                last_name = name
         else:
             name = "<first-name-unset> <last-name-unset>"
             first_name = "<first-name-unset>"
@@ -329,7 +524,11 @@ class Users(ObjectManager):
                 "home_directory": f"/home/fedora/{username}",
                 "disabled": status != "active",
                 "mail": email,
-                "ipasshpubkey": [k.strip() for k in ssh_key.split("\n") if k.strip()] if ssh_key else None,
+                "ipasshpubkey": [
+                    k for k in (line.strip() for line in ssh_key.splitlines()) if k
+                ]
+                if ssh_key
+                else None,
                 "fasircnick": ircnick.strip() if ircnick else None,
                 "faslocale": locale.strip() if locale else None,
                 "fastimezone": timezone.strip() if timezone else None,
@@ -344,7 +543,7 @@ class Users(ObjectManager):
                 user_add_args["random_pass"] = True
                 user_add_args["faslocale"] = user_add_args["faslocale"] or "en_US"
                 user_add_args["fastimezone"] = user_add_args["fastimezone"] or "UTC"
-                self.ipa.user_add(username, **user_add_args)
+                ipa.user_add(username, **user_add_args)
                 return Status.ADDED
             except python_freeipa.exceptions.FreeIPAError as e:
                 if e.message == f'user with name "{username}" already exists':
@@ -358,7 +557,10 @@ class Users(ObjectManager):
 
                     # Avoid resetting already set fields
                     if user_args["faslocale"] is None or user_args["fastimezone"] is None:
-                        ipa_user = self.user_show(username)
+                        ipa_user = existing_ipa_user
+                        if ipa_user is None:
+                            # It wasn't found or failed when looking up users in bulk
+                            ipa_user = ipa.user_show(username)
                         if not user_args["faslocale"]:
                             user_args["faslocale"] = ipa_user.get("faslocale") or "en_US"
                         if not user_args["fastimezone"]:
@@ -371,30 +573,50 @@ class Users(ObjectManager):
                     }
 
                     # Update them instead
-                    self.ipa.user_mod(username, **user_args)
+                    ipa.user_mod(username, **user_args)
                     return Status.UPDATED
                 else:
                     raise
 
-        except python_freeipa.exceptions.Unauthorized:
-            self.ipa.login(
-                self.config["ipa"]["username"], self.config["ipa"]["password"]
+        except python_freeipa.exceptions.Unauthorized as e:
+            if attempt >= REAUTH_RETRIES:
+                print(f"{username}: {e}")
+                return Status.FAILED
+            if attempt:
+                # Back off, other workers may be hammering the server as well
+                time.sleep(REAUTH_COOLDOWN * 2 ** (attempt - 1))
+            ipa.login(self.config["ipa"]["username"], self.config["ipa"]["password"])
+            return self.migrate_user(
+                person, existing_ipa_user, attempt=attempt + 1, ipa=ipa
             )
-            return self.migrate_user(person_orig)
         except python_freeipa.exceptions.FreeIPAError as e:
             if e.message != "no modifications to be performed":
-                print(e)
+                print(f"{username}: {e}")
                 return Status.FAILED
             return Status.UNMODIFIED
         except Exception as e:
-            print(e)
+            print(f"{username}: {e}")
             return Status.FAILED
 
+    @staticmethod
+    def _failed_members(result):
+        errors = []
+        for member_type in ("member", "membermanager"):
+            try:
+                errors.extend(result["failed"][member_type]["user"])
+            except KeyError:
+                continue
+        return errors
+
     def add_users_to_groups(self, groups_to_users, category):
         if self.config["skip_user_membership"]:
             return
 
-        if category not in ["members", "sponsors"]:
+        if category == "members":
+            method, params = "group_add_member", {"no_members": True}
+        elif category == "sponsors":
+            method, params = "group_add_member_manager", {}
+        else:
             raise ValueError("title must be eigher member or sponsor")
 
         click.echo(f"Adding {category} to groups")
@@ -402,61 +624,41 @@ class Users(ObjectManager):
         if total == 0:
             click.echo("Nothing to do.")
             return
+        jobs = [
+            (group, chunk)
+            for group in sorted(groups_to_users)
+            for chunk in self.chunks(groups_to_users[group])
+        ]
+        commands = [
+            (method, [group], {"user": chunk, **params}) for group, chunk in jobs
+        ]
         counter = 0
         with progressbar.ProgressBar(max_value=total, redirect_stdout=True) as bar:
-            for group in sorted(groups_to_users):
-                members = groups_to_users[group]
-                for chunk in self.chunks(members):
-                    counter += len(chunk)
-                    self.check_reauth(counter)
+            for (group, chunk), result in zip(jobs, self.batch(commands)):
+                counter += len(chunk)
+                self.check_reauth(counter)
+                if isinstance(result, Exception):
+                    print_status(
+                        Status.FAILED,
+                        f"Failed to add {chunk} in the {category} of {group}: {result}",
+                    )
+                else:
                     added = set(chunk)
-                    try:
-                        if category == "members":
-                            self.ipa.group_add_member(
-                                group, chunk, no_members=True,
-                            )
-                        elif category == "sponsors":
-                            result = self.ipa._request(
-                                "group_add_member_manager", group, {"user": chunk},
+                    for msg in self._failed_members(result):
+                        if msg[1] == "This entry is already a member":
+                            added.remove(msg[0])
+                        else:
+                            print_status(
+                                Status.FAILED,
+                                f"Failed to add {msg[0]} in the {category} of {group}: "
+                                + msg[1],
                             )
-                            if result["failed"]["membermanager"]["user"]:
-                                raise python_freeipa.exceptions.ValidationError(
-                                    result["failed"]
-                                )
-                    except python_freeipa.exceptions.ValidationError as e:
-                        errors = []
-                        for member_type in ("member", "membermanager"):
-                            try:
-                                errors.extend(e.message[member_type]["user"])
-                            except KeyError:
-                                continue
-                        for msg in errors:
-                            if msg[1] == "This entry is already a member":
-                                added.remove(msg[0])
-                            else:
-                                print_status(
-                                    Status.FAILED,
-                                    f"Failed to add {msg[0]} in the {category} of {group}: "
-                                    + msg[1],
-                                )
-                    except python_freeipa.exceptions.NotFound as e:
-                        print_status(
-                            Status.FAILED,
-                            f"Failed to add {chunk} in the {category} of {group}: {e}",
-                        )
-                    except Exception as e:
+                    if added:
                         print_status(
-                            Status.FAILED,
-                            f"Failed to add {chunk} in the {category} of {group}: {e}",
+                            Status.ADDED,
+                            f"Added {category} to {group}: {', '.join(sorted(added))}",
                         )
-                    else:
-                        if added:
-                            print_status(
-                                Status.ADDED,
-                                f"Added {category} to {group}: {', '.join(sorted(added))}",
-                            )
-                    finally:
-                        bar.update(counter)
+                bar.update(counter)
 
     def remove_users_from_groups(self, groups_to_users):
         if self.config["skip_user_membership"]:
@@ -467,54 +669,45 @@ class Users(ObjectManager):
         if total == 0:
             click.echo("Nothing to do.")
             return
+        jobs = [
+            (group, chunk)
+            for group in sorted(groups_to_users)
+            for chunk in self.chunks(groups_to_users[group])
+        ]
+        commands = [
+            (
+                "group_remove_member",
+                [self.config["groups"]["prefix"] + group],
+                {"user": chunk, "no_members": True},
+            )
+            for group, chunk in jobs
+        ]
         counter = 0
         with progressbar.ProgressBar(max_value=total, redirect_stdout=True) as bar:
-            for group in sorted(groups_to_users):
-                members = groups_to_users[group]
-                for chunk in self.chunks(members):
-                    counter += len(chunk)
-                    self.check_reauth(counter)
-                    removed = set(chunk[:])
-                    try:
-                        self.ipa.group_remove_member(
-                            self.config["groups"]["prefix"] + group,
-                            chunk,
-                            no_members=True,
-                        )
-                    except python_freeipa.exceptions.ValidationError as e:
-                        errors = []
-                        for member_type in ("member", "membermanager"):
-                            try:
-                                errors.extend(e.message[member_type]["user"])
-                            except KeyError:
-                                continue
-                        for msg in errors:
-                            if msg[1] == "This entry is not a member":
-                                removed.remove(msg[0])
-                            else:
-                                print_status(
-                                    Status.FAILED,
-                                    f"Failed to remove {msg[0]} from {group}: "
-                                    + msg[1],
-                                )
-                    except python_freeipa.exceptions.NotFound as e:
-                        print_status(
-                            Status.FAILED,
-                            f"Failed to remove {chunk} from {group}: {e}",
-                        )
-                    except Exception as e:
-                        print_status(
-                            Status.FAILED,
-                            f"Failed to remove {chunk} from {group}: {e}",
-                        )
-                    else:
-                        if removed:
+            for (group, chunk), result in zip(jobs, self.batch(commands)):
+                counter += len(chunk)
+                self.check_reauth(counter)
+                if isinstance(result, Exception):
+                    print_status(
+                        Status.FAILED,
+                        f"Failed to remove {chunk} from {group}: {result}",
+                    )
+                else:
+                    removed = set(chunk)
+                    for msg in self._failed_members(result):
+                        if msg[1] == "This entry is not a member":
+                            removed.remove(msg[0])
+                        else:
                             print_status(
-                                Status.REMOVED,
-                                f"Removed from {group}: {', '.join(sorted(removed))}",
+                                Status.FAILED,
+                                f"Failed to remove {msg[0]} from {group}: " + msg[1],
                             )
-                    finally:
-                        bar.update(counter)
+                    if removed:
+                        print_status(
+                            Status.REMOVED,
+                            f"Removed from {group}: {', '.join(sorted(removed))}",
+                        )
+                bar.update(counter)
 
     def find_user_conflicts(
         self, fas_users: Dict[str, List[Dict]]
@@ -535,23 +728,22 @@ class Users(ObjectManager):
         # FAS users by instance, by name
         fas_users_by_name = {}
 
-        # Map duplicate usernames to fas instance names
-        usernames_to_check_for_fas = defaultdict(set)
+        # Map usernames to the FAS instance names they exist in
+        usernames_to_fas = defaultdict(set)
 
         for fas_name, user_objs in fas_users.items():
             users_by_name = fas_users_by_name[fas_name] = {
                 user_obj["username"]: user_obj for user_obj in user_objs
             }
-
-            for other_fas_name, other_user_objs in fas_users.items():
-                if other_fas_name in fas_users_by_name:
-                    continue
-
-                other_user_names = {uobj["username"] for uobj in other_user_objs}
-
-                usernames_to_check = set(users_by_name) & other_user_names
-                for name in usernames_to_check:
-                    usernames_to_check_for_fas[name] |= {fas_name, other_fas_name}
+            for name in users_by_name:
+                usernames_to_fas[name].add(fas_name)
+
+        # Only usernames existing in more than one FAS instance need to be checked
+        usernames_to_check_for_fas = {
+            name: fas_names
+            for name, fas_names in usernames_to_fas.items()
+            if len(fas_names) > 1
+        }
 
         # Check users existing in different FAS instances
         for username, fas_names in sorted(
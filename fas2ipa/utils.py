@@ -5,7 +5,10 @@ from collections import defaultdict
 from typing import Union
 
 import click
+import python_freeipa
 import toml
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 
 # def chunks(data, n):
@@ -19,6 +22,22 @@ def re_auth(config, instances):
         ipa.login(config["ipa"]["username"], config["ipa"]["password"])
 
 
+def make_http_adapter(pool_size: int) -> HTTPAdapter:
+    """Create an HTTP adapter for a session shared by concurrent workers.
+
+    The adapter keeps up to `pool_size` connections alive so workers don't have to set
+    up a new TCP/TLS connection for each request, and retries failing to connect. IPA
+    JSON-RPC calls are POST requests which aren't retried once they've been sent.
+
+    :param pool_size:   The number of connections to keep alive.
+
+    :return:            The HTTP adapter, to be mounted on a requests session.
+    """
+    return HTTPAdapter(
+        pool_maxsize=pool_size, max_retries=Retry(total=5, backoff_factor=0.5),
+    )
+
+
 class ObjectManager:
     def __init__(self, config, ipa_instances, fas_instances):
         self.config = config
@@ -29,14 +48,51 @@ class ObjectManager:
     def ipa(self):
         return random.choice(self.ipa_instances)
 
+    def needs_reauth(self, counter):
+        return counter % self.config["ipa"]["reauth_every"] == 0
+
     def check_reauth(self, counter):
-        if counter % self.config["ipa"]["reauth_every"] == 0:
+        if self.needs_reauth(counter):
             re_auth(self.config, self.ipa_instances)
 
     def chunks(self, items):
         size = self.config["chunks"]
         return [items[x : x + size] for x in range(0, len(items), size)]
 
+    def batch(self, commands):
+        """Run IPA commands, sending several of them in each request.
+
+        :param commands:    A sequence of `(method, args, params)` tuples.
+
+        :return:            A generator of command results, in the order of the
+                            commands. The result of a failed command is the
+                            corresponding FreeIPAError exception, if the whole
+                            batch request fails it is the raised exception.
+        """
+        size = self.config["batch_size"]
+        for offset in range(0, len(commands), size):
+            batch = commands[offset : offset + size]
+            try:
+                response = self.ipa._request(
+                    "batch",
+                    [
+                        {"method": method, "params": [args, params]}
+                        for method, args, params in batch
+                    ],
+                )
+            except Exception as e:
+                yield from (e for _ in batch)
+                continue
+            for result in response["results"]:
+                if result.get("error"):
+                    try:
+                        python_freeipa.exceptions.parse_error(
+                            {"message": result["error"], "code": result["error_code"]}
+                        )
+                    except python_freeipa.exceptions.FreeIPAError as e:
+                        result = e
+                yield result
+
 
 def load_data(fpath: Union[str, pathlib.Path]) -> dict:
     """Load dictionary data from a JSON, YAML, or TOML file.